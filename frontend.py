@@ -1,9 +1,13 @@
 # frontend.py (stable, POST-only, session-state initialized, no blinking)
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from streamlit_folium import st_folium
 import folium
 from datetime import date
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # -----------------------------
 # SESSION STATE INITIALIZATION
@@ -19,7 +23,30 @@ st.session_state.setdefault("last_weather", None)
 # Configuration
 # ===============================
 API_URL = "http://127.0.0.1:8000"  # change if deployed elsewhere
-#REQUEST_TIMEOUT = 60  # seconds
+REQUEST_TIMEOUT = 60  # seconds
+
+# Streamlit re-executes this script on every rerun, so shared objects are built
+# once in st.cache_resource factories and handed back on later runs.
+@st.cache_resource(show_spinner=False)
+def get_session() -> requests.Session:
+    """One keep-alive session shared by every tab, so repeated clicks
+    reuse pooled connections instead of opening a new socket each time."""
+    session = requests.Session()
+    session.mount(
+        "http://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.2))
+    )
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    """Worker pool for tabs that fire several independent backend calls at once."""
+    return ThreadPoolExecutor(max_workers=8)
+
+
+SESSION = get_session()
+_executor = get_executor()
 
 st.set_page_config(page_title="TravelMind AI", layout="wide")
 st.title("🧭 AI-Powered Travel Assistant")
@@ -29,47 +56,161 @@ st.markdown("Explore places, get weather, calculate distances, and plan trips us
 # -----------------------
 # Helper: POST request wrapper
 # -----------------------
+def _handle_response(endpoint: str, resp):
+    if resp.status_code == 200:
+        return resp.json()
+    st.error(f"API Error {resp.status_code}: {resp.text}")
+    return None
+
+
+class ApiError(Exception):
+    """A failed backend call; raised inside cached helpers so st.cache_data never stores it."""
+
+
+def _post_json(endpoint: str, payload: dict):
+    try:
+        resp = SESSION.post(f"{API_URL}/{endpoint}", json=payload, timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        raise ApiError(f"Connection error (endpoint: {endpoint}): {e}") from e
+    if resp.status_code != 200:
+        raise ApiError(f"API Error {resp.status_code}: {resp.text}")
+    return resp.json()
+
+
 def post_request(endpoint: str, payload: dict):
     try:
-        resp = requests.post(f"{API_URL}/{endpoint}", json=payload) #, timeout=REQUEST_TIMEOUT)
-        if resp.status_code == 200:
-            return resp.json()
-        else:
-            st.error(f"API Error {resp.status_code}: {resp.text}")
-            return None
+        return _post_json(endpoint, payload)
+    except ApiError as e:
+        st.error(str(e))
+        return None
+
+
+def stream_request(endpoint: str, payload: dict):
+    """Yield text pieces from a streaming endpoint as they arrive."""
+    try:
+        with SESSION.post(f"{API_URL}/{endpoint}", json=payload, timeout=REQUEST_TIMEOUT, stream=True) as resp:
+            if resp.status_code != 200:
+                st.error(f"API Error {resp.status_code}: {resp.text}")
+                return
+            yield from resp.iter_content(chunk_size=None, decode_unicode=True)
     except requests.exceptions.RequestException as e:
         st.error(f"Connection error (endpoint: {endpoint}): {e}")
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_post_json(endpoint: str, payload_key: tuple):
+    data = _post_json(endpoint, dict(payload_key))
+    # the backend reports some lookup failures inside a 200 body; don't cache those either
+    if isinstance(data.get("nearby_places"), str):
+        raise ApiError(data["nearby_places"])
+    weather = data.get("weather")
+    if isinstance(weather, dict) and "error" in weather:
+        raise ApiError(weather["error"])
+    distance = data.get("distance")
+    if isinstance(distance, str) and distance.startswith("Could not resolve"):
+        raise ApiError(distance)
+    return data
+
+
+def cached_post(endpoint: str, payload_key: tuple):
+    """post_request for idempotent lookups; payload_key is tuple(sorted(payload.items())).
+    Only successful responses are cached."""
+    try:
+        return _cached_post_json(endpoint, payload_key)
+    except ApiError as e:
+        st.error(str(e))
         return None
 
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_description_json(place: str):
+    return _post_json("place_description", {"place_name": place})
+
+
+def fetch_description(place: str):
+    """Wikipedia summaries rarely change, so repeat lookups are served from cache."""
+    try:
+        return _fetch_description_json(place)
+    except ApiError as e:
+        st.error(str(e))
+        return None
+
+
+# -----------------------
+# Helper: concurrent POSTs
+# -----------------------
+def post_many(endpoint_payload_pairs) -> dict:
+    """Send several POSTs concurrently and return {endpoint: json or None}.
+
+    Only the HTTP calls run in worker threads; Streamlit errors are
+    reported afterwards from the script thread.
+    """
+    futures = {
+        _executor.submit(SESSION.post, f"{API_URL}/{endpoint}", json=payload, timeout=REQUEST_TIMEOUT): endpoint
+        for endpoint, payload in endpoint_payload_pairs
+    }
+    results = {}
+    for future in as_completed(futures):
+        endpoint = futures[future]
+        try:
+            results[endpoint] = _handle_response(endpoint, future.result())
+        except requests.exceptions.RequestException as e:
+            st.error(f"Connection error (endpoint: {endpoint}): {e}")
+            results[endpoint] = None
+    return results
+
 # -----------------------
-# Sidebar navigation
+# Helper: route map (cached across reruns)
 # -----------------------
-st.sidebar.title("🔍 Navigation")
-tab = st.sidebar.radio(
-    "Choose a feature",
-    [
-        "💬 Chat with AI",
-        "🔎 Place Description",
-        "🏙️ Nearby Attractions",
-        "☀️ Weather Info",
-        "📏 Distance Finder",
-        "🗺️ Route Planner",
-        "🧠 Smart Itinerary"
-    ],
-)
+@st.cache_resource(show_spinner=False)
+def build_route_map(coords_key: tuple) -> folium.Map:
+    """coords_key is a tuple of (lat, lon, name) stops, in visiting order."""
+    m = folium.Map(location=[coords_key[0][0], coords_key[0][1]], zoom_start=8)
+    for i, (lat, lon, name) in enumerate(coords_key):
+        folium.Marker(
+            [lat, lon],
+            tooltip=f"Stop {i+1}",
+            popup=name or f"Stop {i+1}"
+        ).add_to(m)
+    folium.PolyLine([(lat, lon) for lat, lon, _ in coords_key], weight=3, color="blue").add_to(m)
+    return m
+
+# -----------------------
+# Helper: weather display
+# -----------------------
+def render_weather(weather: dict):
+    """Render the structured /weather payload (forecast table or current conditions)."""
+    if "error" in weather:
+        st.error(weather["error"])
+    elif weather.get("forecast"):
+        st.subheader(f"Weather Forecast for {weather['location']}")
+        df = pd.DataFrame(weather["forecast"]).rename(columns={
+            "date": "Date",
+            "max_temp": "Max Temp (°C)",
+            "min_temp": "Min Temp (°C)",
+            "rain_mm": "Rain (mm)",
+            "weather_code": "Code",
+        })
+        st.dataframe(df, hide_index=True)
+    elif weather.get("current"):
+        current = weather["current"]
+        st.subheader(f"Current Weather in {weather['location']}")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Temperature", f"{current.get('temperature', '-')} °C")
+        c2.metric("Wind Speed", f"{current.get('windspeed', '-')} km/h")
+        c3.metric("Weather Code", current.get("weather_code", "-"))
 
 # -----------------------
 # Chat tab (POST /ask)
 # -----------------------
-if tab == "💬 Chat with AI":
+@st.fragment
+def chat_tab():
     st.header("💬 Chat with the AI Travel Assistant")
 
     # show history
     for msg in st.session_state.chat_history:
-        if msg["role"] == "user":
-            st.markdown(f"**You:** {msg['content']}")
-        else:
-            st.markdown(f"**AI:** {msg['content']}")
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
 
     query = st.text_area("Type your message...", height=100, placeholder="E.g., 'Show nearby attractions in Delhi within 5 km'")
 
@@ -77,23 +218,24 @@ if tab == "💬 Chat with AI":
         if not query.strip():
             st.warning("Please enter a message.")
         else:
+            # render the new turn in place instead of re-running the whole script
+            history = list(st.session_state.chat_history)
             st.session_state.chat_history.append({"role": "user", "content": query})
-            with st.spinner("AI is thinking..."):
-                res = post_request("ask", {"query": query})
-                if res:
-                    ai_text = res.get("response") or res.get("answer") or str(res)
-                    st.session_state.chat_history.append({"role": "ai", "content": ai_text})
-                    st.rerun()
+            st.chat_message("user").markdown(query)
+            with st.chat_message("ai"):
+                ai_text = st.write_stream(stream_request("ask_stream", {"query": query, "history": history}))
+            if ai_text:
+                st.session_state.chat_history.append({"role": "ai", "content": ai_text})
 
 # -----------------------
 # Place description (/place_description)
 # -----------------------
-elif tab == "🔎 Place Description":
+@st.fragment
+def place_description_tab():
     st.header("Get Short Place Description (Wikipedia)")
     place = st.text_input("Place name", "Kolkata")
     if st.button("Get Description"):
-        payload = {"place_name": place}
-        data = post_request("place_description", payload)
+        data = fetch_description(place)
         if data:
             desc = data.get("description") or str(data)
             st.write(desc)
@@ -102,7 +244,8 @@ elif tab == "🔎 Place Description":
 # -----------------------
 # Nearby Attraction  (/nearby)
 # -----------------------
-elif tab == "🏙️ Nearby Attractions":
+@st.fragment
+def nearby_tab():
     st.header("🌍 Find Nearby Places")
 
     # user input
@@ -117,23 +260,18 @@ elif tab == "🏙️ Nearby Attractions":
         }
 
         with st.spinner("Fetching nearby places..."):
-            data = post_request("nearby", payload)
+            data = cached_post("nearby", tuple(sorted(payload.items())))
 
+        # errors (including the backend's error strings) were already shown by cached_post
         if not data:
-            st.error("No response from backend.")
-            st.stop()
+            return
 
         result = data.get("nearby_places")
 
-        # If backend returns an error string
-        if isinstance(result, str):
-            st.error(result)
-            st.stop()
-
         # EMPTY LIST
         if len(result) == 0:
             st.warning(f"No nearby places found within {radius} km of **{place}**.")
-            st.stop()
+            return
 
         # SUCCESS
         st.success(f"Found {len(result)} places within {radius} km of **{place}**")
@@ -152,7 +290,8 @@ elif tab == "🏙️ Nearby Attractions":
 # -----------------------
 # Weather Info 
 # -----------------------
-elif tab == "☀️ Weather Info":
+@st.fragment
+def weather_tab():
     st.header("Weather Forecast / Current Weather")
 
     city = st.text_input("City name", "Kolkata")
@@ -167,57 +306,17 @@ elif tab == "☀️ Weather Info":
 
     if st.button("Get Weather"):
         payload = {"city": city, "start_date": start_date, "end_date": end_date}
-        data = post_request("weather", payload)
+        data = cached_post("weather", tuple(sorted(payload.items())))
 
         if data:
-            raw_weather = data.get("weather")
-
-            # If backend returns plain text → parse & display nicely
-            if isinstance(raw_weather, str):
-
-                lines = raw_weather.strip().split("\n")
-
-                # First line = Main heading
-                st.subheader(lines[0])
-
-                # If forecast format
-                if "→" in lines[0] and len(lines) > 1:
-                    # Create a clean weather table
-                    table_data = []
-                    for line in lines[1:]:
-                        try:
-                            date_part, rest = line.split(":", 1)
-                            parts = rest.split("/")
-                            max_t = parts[0].replace("Max", "").replace("°C", "").strip()
-                            min_t = parts[1].replace("Min", "").replace("°C", "").strip()
-                            rain = parts[2].replace("Rain", "").replace("mm", "").strip()
-                            #code = parts[3].replace("Code", "").strip()
-
-                            table_data.append({
-                                "Date": date_part.strip(),
-                                "Max Temp (°C)": max_t,
-                                "Min Temp (°C)": min_t,
-                                "Rain (mm)": rain,
-                                #"Code": code
-                            })
-                        except:
-                            pass
-
-                    st.table(table_data)
-
-                else:
-                    # If single day / current weather → just display text
-                    st.text(raw_weather)
-
-            else:
-                # If backend ever sends JSON instead
-                st.json(raw_weather)
+            render_weather(data.get("weather") or {})
 
 
 # -----------------------
 # Distance Finder (/distance)
 # -----------------------
-elif tab == "📏 Distance Finder":
+@st.fragment
+def distance_tab():
     st.header("Distance Between Two Places")
     c1, c2 = st.columns(2)
     with c1:
@@ -226,7 +325,7 @@ elif tab == "📏 Distance Finder":
         place2 = st.text_input("To", "Darjeeling")
     if st.button("Calculate"):
         payload = {"place1": place1, "place2": place2}
-        data = post_request("distance", payload)
+        data = cached_post("distance", tuple(sorted(payload.items())))
         if data:
             # your backend returns {"distance": "..."} or a string - handle both
             dist = data.get("distance") or data.get("distance_km") or str(data)
@@ -235,7 +334,8 @@ elif tab == "📏 Distance Finder":
 # ===============================
 # 🗺️ Route Planner (Stable Map)
 # ===============================
-elif tab == "🗺️ Route Planner":
+@st.fragment
+def route_planner_tab():
     st.header("🗺️ Best Route Planner")
 
     city = st.text_input("Enter base city:", key="route_city")
@@ -252,19 +352,16 @@ elif tab == "🗺️ Route Planner":
         else:
             places = [p.strip() for p in places_input.split(",") if p.strip()]
             with st.spinner("Finding best route..."):
-                try:
-                    response = requests.post(
-                        f"{API_URL}/best_route",
-                        json={"city": city, "places": places},
-                        #timeout=REQUEST_TIMEOUT
-                    )
-                    if response.status_code == 200:
-                        st.session_state.route_data = response.json()
-                        st.session_state.route_map_visible = True
-                    else:
-                        st.error(f"API Error: {response.status_code} — {response.text}")
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Connection failed: {e}")
+                # route + current weather for the base city are independent → fetch together
+                results = post_many([
+                    ("best_route", {"city": city, "places": places}),
+                    ("weather", {"city": city}),
+                ])
+                if results.get("best_route"):
+                    st.session_state.route_data = results["best_route"]
+                    st.session_state.route_map_visible = True
+                weather = results.get("weather")
+                st.session_state.last_weather = weather.get("weather") if weather else None
 
     # Render saved result (persistent across reruns)
     if st.session_state.get("route_map_visible") and st.session_state.get("route_data"):
@@ -276,16 +373,13 @@ elif tab == "🗺️ Route Planner":
             st.subheader("💡 Suggested Route Instructions")
             st.info(ai_description)
 
+        if st.session_state.get("last_weather"):
+            render_weather(st.session_state.last_weather)
+
         coords = data.get("coordinates", [])
         if coords and isinstance(coords, list) and len(coords) > 0:
-            m = folium.Map(location=[coords[0]["lat"], coords[0]["lon"]], zoom_start=8)
-            for i, c in enumerate(coords):
-                folium.Marker(
-                    [c["lat"], c["lon"]],
-                    tooltip=f"Stop {i+1}",
-                    popup=c.get("name", f"Stop {i+1}")
-                ).add_to(m)
-            folium.PolyLine([(c["lat"], c["lon"]) for c in coords], weight=3, color="blue").add_to(m)
+            key = tuple((c["lat"], c["lon"], c.get("name", "")) for c in coords)
+            m = build_route_map(key)
             st_folium(m, width=700, height=500)
         else:
             st.info("No coordinates returned to plot the route.")
@@ -293,7 +387,8 @@ elif tab == "🗺️ Route Planner":
 # -----------------------
 # Smart Itinerary (/generate_itinerary)
 # -----------------------
-elif tab == "🧠 Smart Itinerary":
+@st.fragment
+def itinerary_tab():
     st.header("AI Trip Itinerary Generator")
     location = st.text_input("Location", "Kolkata")
     days = st.number_input("Days", min_value=1, max_value=14, value=3)
@@ -303,13 +398,48 @@ elif tab == "🧠 Smart Itinerary":
 
     if st.button("Generate Itinerary"):
         payload = {"city": location, "days": int(days), "interests": interests, "budget": budget, "mode": mode}
-        data = post_request("generate_itinerary", payload)
-        if data:
-            st.session_state.last_itinerary = data.get("itinerary")
-            if st.session_state.last_itinerary:
-                st.markdown(st.session_state.last_itinerary)
-            else:
-                st.info("No itinerary returned.")
+        # fetch the place summary alongside the itinerary; it is shown above it once ready
+        summary_slot = st.empty()
+        place_future = _executor.submit(
+            SESSION.post, f"{API_URL}/place_description", json={"place_name": location}, timeout=REQUEST_TIMEOUT
+        )
+        itinerary = st.write_stream(stream_request("generate_itinerary_stream", payload))
+        st.session_state.last_itinerary = itinerary or None
+        if not itinerary:
+            st.info("No itinerary returned.")
+
+        try:
+            place_info = _handle_response("place_description", place_future.result())
+        except requests.exceptions.RequestException as e:
+            st.error(f"Connection error (endpoint: place_description): {e}")
+            place_info = None
+        if place_info and place_info.get("description"):
+            summary_slot.info(place_info["description"])
+
+# -----------------------
+# Tabs: each tab body is an st.fragment, so interacting
+# with a tab only reruns that tab, not the whole script
+# -----------------------
+tabs = st.tabs([
+    "💬 Chat with AI",
+    "🔎 Place Description",
+    "🏙️ Nearby Attractions",
+    "☀️ Weather Info",
+    "📏 Distance Finder",
+    "🗺️ Route Planner",
+    "🧠 Smart Itinerary",
+])
+for tab, render_tab in zip(tabs, [
+    chat_tab,
+    place_description_tab,
+    nearby_tab,
+    weather_tab,
+    distance_tab,
+    route_planner_tab,
+    itinerary_tab,
+]):
+    with tab:
+        render_tab()
 
 # -----------------------
 # Footer note
@@ -1,28 +1,71 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-from rag import ask_rag
+from operator import itemgetter
+import asyncio
+import threading
+from rag import ask_rag, ask_rag_stream
 from tools import (
     plan_trip_tool,
     get_weather_tool,
-    get_best_route_tool,
     find_nearby_tool,
     get_distance_tool,
     get_place_description
 )
-from tools import get_coordinates,find_nearby_places,generate_route_prompt
+from tools import find_nearby_places_async,prewarm_nearby_places,plan_and_describe_route,plan_trip_stream
 
 app = FastAPI(
     title="TravelMind AI",
     description="Explore attractions, plan trips, get weather updates, and find optimal routes using LangChain + Gemini.",
-    version="1.2"
+    version="1.2",
+    default_response_class=ORJSONResponse
 )
 
+# Cities that dominate traffic; warmed into the geocode/nearby caches at startup
+POPULAR_CITIES = [
+    "Kolkata", "Delhi", "Mumbai", "Bengaluru", "Chennai",
+    "Hyderabad", "Jaipur", "Agra", "Varanasi", "Goa",
+    "Darjeeling", "Pune", "Ahmedabad", "Udaipur", "Shimla",
+    "Manali", "Rishikesh", "Amritsar", "Mysuru", "Kochi",
+]
+DEFAULT_NEARBY_RADIUS_KM = 0.5  # matches the frontend slider default
+prewarm_task = None
+# asks the warm-up thread to stop between cities; cancelling the task alone leaves it running
+prewarm_stop = threading.Event()
+
+
+async def prewarm_caches():
+    # geocodes every city (rate-limited), then one batched Overpass request for all of them;
+    # with several uvicorn workers only the first one to start actually does this
+    await asyncio.to_thread(prewarm_nearby_places, POPULAR_CITIES, DEFAULT_NEARBY_RADIUS_KM, prewarm_stop)
+
+
+@app.on_event("startup")
+async def start_prewarm():
+    # run in the background so startup isn't held up by ~20 s of rate-limited geocoding
+    global prewarm_task
+    prewarm_task = asyncio.create_task(prewarm_caches())
+
+
+@app.on_event("shutdown")
+async def stop_prewarm():
+    # the thread finishes the geocode in flight, then exits
+    prewarm_stop.set()
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+
 # ===========================
 # Models
 # ===========================
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
 class QueryInput(BaseModel):
     query: str
+    history: list[ChatMessage] = []
 
 
 class TripInput(BaseModel):
@@ -73,10 +116,20 @@ def ask_general(input_data: QueryInput):
     if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
     try:
-        response = ask_rag(query)
+        history = [m.model_dump() for m in input_data.history]
+        response = ask_rag(query, history)
         return {"query": query, "response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/ask_stream")
+def ask_general_stream(input_data: QueryInput):
+    query = input_data.query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+    history = [m.model_dump() for m in input_data.history]
+    return StreamingResponse(ask_rag_stream(query, history), media_type="text/plain")
     
 
 @app.post("/place_description")
@@ -89,68 +142,32 @@ def place_description(input_data: PlaceDescriptionInput):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-coords_cache = {}
 
 @app.post("/nearby")
-def nearby_places(req: NearbyRequest):
+async def nearby_places(req: NearbyRequest):
     place_name = req.place_name.strip()
     radius_km = float(req.radius_km)
 
-    # Step 1: get coordinates safely
-    if place_name in coords_cache:
-        coords = coords_cache[place_name]
-    else:
-        coords = get_coordinates(place_name)
-        if not coords:
-            return {"nearby_places": f"Could not find coordinates for '{place_name}'."}
-        coords_cache[place_name] = coords
-
-    # Step 2: call the tool safely
+    # Step 1 + 2: geocode (memoized) and query Overpass without blocking the event loop
     try:
-        tool_result = find_nearby_places(place_name=place_name, radius_km=radius_km)
+        tool_result = await find_nearby_places_async(place_name, radius_km)
     except Exception as e:
         return {"nearby_places": f"Error fetching nearby places: {str(e)}"}
 
-    # Step 3: parse the tool output
-    result_list = []
-    seen_names = set()  # for removing duplicates
-
+    # The tool only returns a string when something went wrong
     if isinstance(tool_result, str):
-        lines = tool_result.split("\n")[1:]  # skip first line
-        for line in lines:
-            line = line.strip().lstrip("- ").strip()
-            if "(" in line and "km" in line:
-                name, dist_part = line.rsplit("(", 1)
-                name = name.strip()
-                if name in seen_names:
-                    continue  # skip duplicate
-                seen_names.add(name)
-                dist = dist_part.replace("km)", "").strip()
-                try:
-                    dist = float(dist)
-                except:
-                    dist = 0.0
-                result_list.append({"name": name, "distance_km": dist})
-    else:
-        # If tool returns structured data (list/dict)
-        for item in tool_result:
-            name = item.get("name", "").strip()
-            if name in seen_names or not name:
-                continue
-            seen_names.add(name)
-            dist = item.get("distance_km", 0.0)
-            result_list.append({"name": name, "distance_km": dist})
-
-    # Step 4: sort by distance
-    result_list = sorted(result_list, key=lambda x: x["distance_km"])
-
-    # Step 5: ensure at least 10 places (if available)
-    if len(result_list) < 10 and isinstance(tool_result, list):
-        # try increasing radius or adding more results if possible
-        # for now we just return whatever is available
-        pass
-
-    return {"nearby_places": result_list[:10]}  # return max 10 places
+        return {"nearby_places": tool_result}
+
+    # Step 3: dedupe by name (tool output is already nearest-first)
+    seen = {}
+    for item in tool_result:
+        name = item["name"].strip()
+        if name:
+            seen.setdefault(name, item["distance_km"])
+
+    # Step 4: sort by distance, return max 10 places
+    nearest = sorted(seen.items(), key=itemgetter(1))[:10]
+    return {"nearby_places": [{"name": name, "distance_km": dist} for name, dist in nearest]}
 
 @app.post("/distance")
 def calculate_distance(input_data: DistanceInput):
@@ -180,33 +197,17 @@ def get_weather(input_data: WeatherInput):
 @app.post("/best_route")
 def best_route(input_data: RouteInput):
     try:
-        # 1️⃣ Get the best route from the tool
-        result = get_best_route_tool.invoke({
-            "city": input_data.city,
-            "places": input_data.places
-        })
+        # 1️⃣ Compute the route and its human-like description in one pass
+        result = plan_and_describe_route(input_data.city, input_data.places)
 
         if isinstance(result, dict) and "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
 
-        # Extract the ordered list of places from the best route
-        # The tool currently only returns text like "Best route: City → Place1 → Place2 ..."
         route_text = result.get("route_info", "")
         coords = result.get("coordinates", [])
+        description = result.get("description", "")
 
-        # Parse best_places from route string
-        if "→" in route_text:
-            parts = [p.strip() for p in route_text.split("→")]
-            # Remove the starting city
-            best_places = parts[1:] if parts[0].lower() == input_data.city.lower() else parts
-        else:
-            best_places = input_data.places  # fallback
-
-        # 2️⃣ Generate prompt and ask RAG for human-like description
-        prompt = generate_route_prompt(input_data.city, best_places)
-        description = ask_rag(prompt) if prompt else ""
-
-        # 3️⃣ Return full info
+        # 2️⃣ Return full info
         return {
             "city": input_data.city,
             "best_route": route_text,
@@ -234,4 +235,20 @@ def generate_itinerary(input_data: TripInput):
         })
         return {"itinerary": response}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/generate_itinerary_stream")
+def generate_itinerary_stream(input_data: TripInput):
+    if input_data.days <= 0:
+        raise HTTPException(status_code=400, detail="Days must be greater than zero.")
+
+    def stream():
+        try:
+            yield from plan_trip_stream(
+                input_data.city, input_data.days, input_data.interests, input_data.budget, input_data.mode
+            )
+        except Exception as e:
+            yield f"⚠️ Error while generating the itinerary: {str(e)}"
+
+    return StreamingResponse(stream(), media_type="text/plain")
@@ -1,6 +1,6 @@
 # rag.py
 from langgraph.graph import StateGraph, START, END, MessagesState
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.prebuilt import ToolNode
 from tools import (
@@ -87,8 +87,7 @@ rag_app = graph.compile()
 # =======================================
 # Helper Function: Ask RAG
 # =======================================
-def ask_rag(query: str) -> str:
-    system_instruction = """
+SYSTEM_INSTRUCTION = """
     You are an intelligent AI travel assistant that can answer user queries using tools:
     - get_weather_tool: for current weather
     - get_distance_tool: for distance between two places
@@ -99,13 +98,34 @@ def ask_rag(query: str) -> str:
     Always respond clearly and conversationally in English.
     """
 
+# after the first piece (sent at once), stream chunks are batched up to this many characters
+STREAM_FLUSH_CHARS = 80
+# graph nodes whose messages make up the answer: the LLM's text and, when it calls one, the tool's output
+STREAM_NODES = ("llm", "tools")
+EMPTY_RESPONSE = "I'm sorry, I couldn't process that request. Please try rephrasing."
+
+# only the last 8 turns (user + AI message each) are sent to Gemini
+HISTORY_WINDOW_MESSAGES = 16
+
+
+def _build_messages(query: str, history: list = None) -> dict:
+    """
+    System prompt + the trimmed chat history + the new query.
+    history is a list of {"role": "user" | "ai", "content": str}, oldest first.
+    """
+    messages = [HumanMessage(role="system", content=SYSTEM_INSTRUCTION)]
+    for msg in (history or [])[-HISTORY_WINDOW_MESSAGES:]:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+    messages.append(HumanMessage(role="user", content=query))
+    return {"messages": messages}
+
+
+def ask_rag(query: str, history: list = None) -> str:
     try:
-        result = rag_app.invoke({
-            "messages": [
-                HumanMessage(role="system", content=system_instruction),
-                HumanMessage(role="user", content=query)
-            ]
-        })
+        result = rag_app.invoke(_build_messages(query, history))
 
         if isinstance(result, dict) and "messages" in result:
             response = result["messages"][-1].content
@@ -115,12 +135,54 @@ def ask_rag(query: str) -> str:
             response = str(result)
 
         if not response.strip():
-            response = "I'm sorry, I couldn't process that request. Please try rephrasing."
+            response = EMPTY_RESPONSE
 
         return response
 
     except Exception as e:
         return f"⚠️ Error while processing your request: {str(e)}"
+
+
+# =======================================
+# Helper Function: Ask RAG (streaming)
+# =======================================
+def ask_rag_stream(query: str, history: list = None):
+    """
+    Streaming ask_rag: yields the answer piece by piece as it is generated.
+    That is the LLM's text plus, when it calls a tool, the tool's output (what ask_rag returns).
+    The first piece goes out immediately; after that chunks are batched by size.
+    """
+    try:
+        buffer = []
+        buffered = 0
+        sent_any = False
+        for chunk, metadata in rag_app.stream(_build_messages(query, history), stream_mode="messages"):
+            node = metadata.get("langgraph_node")
+            if node not in STREAM_NODES:
+                continue
+            # tool output arrives as one whole message; keep it apart from the LLM's text
+            text = chunk.content if isinstance(chunk.content, str) else (str(chunk.content) if node == "tools" else "")
+            if not text:
+                continue
+            if node == "tools" and (sent_any or buffer):
+                text = "\n\n" + text
+            if not sent_any:
+                sent_any = True
+                yield text
+                continue
+            buffer.append(text)
+            buffered += len(text)
+            if buffered >= STREAM_FLUSH_CHARS:
+                yield "".join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield "".join(buffer)
+        if not sent_any:
+            yield EMPTY_RESPONSE
+
+    except Exception as e:
+        yield f"⚠️ Error while processing your request: {str(e)}"
     
 
 
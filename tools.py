@@ -3,12 +3,27 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
-import overpass
-import wikipedia
+from geopy.extra.rate_limiter import RateLimiter
+from diskcache import Cache, Lock
+import re
 import itertools
+from types import MappingProxyType
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import quote
+from requests_cache import CachedSession
+import aiohttp
+import orjson
+import asyncio
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import os
+import logging
+import time
 
 # ======================================
 # Environment and API Setup
@@ -18,62 +33,323 @@ OPENTRIPMAP_API_KEY = os.getenv("OPENTRIPMAP_API_KEY")
 api_key = os.getenv('GOOGLE_API_KEY')
 os.environ["GOOGLE_API_KEY"] = api_key
 
+logger = logging.getLogger(__name__)
+
 # Initialize services
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-pro")
 geolocator = Nominatim(user_agent="tour_planner_app")
-overpass_api = overpass.API()
+# Persistent geocode cache, survives restarts
+GEOCODE_CACHE_TTL = 86400 * 30  # 30 days
+_geo_cache = Cache(".geocache")
+NOMINATIM_MIN_DELAY = 1.0  # Nominatim allows 1 request/second
+
+
+def _nominatim_geocode(query: str):
+    # the spacing is tracked in the shared disk cache, so the limit holds
+    # across all uvicorn worker processes, not just within one of them
+    with Lock(_geo_cache, ("__nominatim__", "lock"), expire=60):
+        wait = _geo_cache.get(("__nominatim__", "last"), 0) + NOMINATIM_MIN_DELAY - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return geolocator.geocode(query)
+        finally:
+            _geo_cache.set(("__nominatim__", "last"), time.time())
+
+
+# every lookup goes through this limiter (retries, and errors come back as None)
+_geocode = RateLimiter(_nominatim_geocode, min_delay_seconds=NOMINATIM_MIN_DELAY)
+# One keep-alive session for every outbound HTTP call (pooled per host, retried on 429/5xx).
+# GET responses are cached in SQLite with per-host TTLs; first matching pattern wins.
+SESSION = CachedSession(
+    "travelmind_cache",
+    backend="sqlite",
+    expire_after=3600,
+    urls_expire_after={
+        "en.wikivoyage.org": 86400 * 7,
+        "en.wikipedia.org": 86400 * 7,
+        "api.opentripmap.com": 86400,
+        "api.open-meteo.com/v1/forecast?*current_weather*": 600,
+        "api.open-meteo.com": 3600,
+    },
+)
+SESSION.headers["User-Agent"] = "TravelMindAI/1.0"
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+    )
+)
+WIKI_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/"
+WIKIVOYAGE_URL = "https://en.wikivoyage.org/w/api.php"
+# fixed part of the Wikivoyage extract query; only "titles" changes per call
+WIKIVOYAGE_PARAMS = MappingProxyType({
+    "action": "query",
+    "prop": "extracts",
+    "format": "json",
+    "origin": "*",
+    "formatversion": 2,
+    "explaintext": 1
+})
+# travel-guide sections passed on to the LLM, in output order
+WIKIVOYAGE_SECTIONS = ("Understand", "Get in", "Get around", "Stay safe", "Eat", "Drink")
+OPENTRIPMAP_RADIUS_URL = (
+    "https://api.opentripmap.com/0.1/en/places/radius?"
+    "radius=5000&lon={lon}&lat={lat}&limit={limit}&rate=1&format=json&apikey={apikey}"
+)
+OPEN_METEO_DAILY_URL = (
+    "https://api.open-meteo.com/v1/forecast?"
+    "latitude={lat}&longitude={lon}"
+    "&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode"
+    "&timezone=auto&start_date={start_date}&end_date={end_date}"
+)
+OPEN_METEO_CURRENT_URL = (
+    "https://api.open-meteo.com/v1/forecast?"
+    "latitude={lat}&longitude={lon}"
+    "&current_weather=true&timezone=auto"
+)
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+# (connect, read) seconds; a dead upstream fails fast instead of stalling the worker
+HTTP_TIMEOUT = (3.05, 10)
+EARTH_RADIUS_KM = 6371.0
+# top-level section heading in a plain-text Wikivoyage extract, e.g. "== Get in =="
+WIKIVOYAGE_HEADING_RE = re.compile(r"^==(?!=)\s*(.+?)\s*==\s*$", re.MULTILINE)
+HELD_KARP_MAX_PLACES = 12  # exact search above this gets too slow
+BRANCH_AND_BOUND_MAX_NODES = 200_000  # search budget for larger routes; best-so-far is kept
 last_place_coords = None
 
+# Background event loop + shared aiohttp client, so the sync tools can run async I/O
+# without paying for a fresh event loop (asyncio.run) on every call
+_aio_loop = asyncio.new_event_loop()
+threading.Thread(target=_aio_loop.run_forever, name="tools-aio", daemon=True).start()
+_aio_client = None
+
+# Overpass results keyed on (place, radius); on disk so all uvicorn workers share hits
+NEARBY_CACHE_TTL = 86400  # 1 day
+_nearby_cache = Cache(".nearby_cache", eviction_policy="least-recently-used")
+PREWARM_FLAG_KEY = ("__prewarm__",)  # set by the worker that warms the cache at startup
+
+
+def _json(resp) -> dict:
+    """Parse a requests response body with orjson (much faster than resp.json() on large payloads)."""
+    return orjson.loads(resp.content)
+
 
 # ======================================
 # Helper: Get Coordinates of a Place
 # ======================================
 def get_coordinates(place_name: str):
-    """Returns (latitude, longitude) of a place using Nominatim."""
-    location = geolocator.geocode(place_name)
-    if not location:
+    """Returns (latitude, longitude) of a place using Nominatim (disk-cached, rate-limited)."""
+    # normalize first so "Paris", "paris " and "PARIS" share one cache entry
+    try:
+        return _get_coordinates_cached(place_name.strip().lower())
+    except LookupError:
         return None
-    return (location.latitude, location.longitude)
+
+
+@lru_cache(maxsize=1024)
+def _get_coordinates_cached(key: str):
+    coords = _geo_cache.get(key)
+    if coords is not None:
+        return coords
+
+    # RateLimiter turns geocoder errors into None, so a miss may be transient:
+    # raise instead of returning None, lru_cache doesn't memoize exceptions
+    location = _geocode(key)
+    if not location:
+        raise LookupError(key)
+    coords = (location.latitude, location.longitude)
+    _geo_cache.set(key, coords, expire=GEOCODE_CACHE_TTL)
+    return coords
 
 # ======================================
 # Helper: Find Nearby Places via Overpass
 # ======================================
+def _run_async(coro):
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _aio_loop).result()
+
+
+async def _get_aio_client() -> aiohttp.ClientSession:
+    # created lazily on the background loop so it is bound to that loop
+    global _aio_client
+    if _aio_client is None:
+        _aio_client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=16, keepalive_timeout=60),
+            cookie_jar=aiohttp.DummyCookieJar(),
+            headers={"User-Agent": "TravelMindAI/1.0"},
+        )
+    return _aio_client
+
+
+async def _overpass_post(client: aiohttp.ClientSession, query: str, timeout: float = 30) -> dict:
+    client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=HTTP_TIMEOUT[0])
+    async with client.post(OVERPASS_URL, data={"data": query}, timeout=client_timeout) as resp:
+        resp.raise_for_status()
+        return orjson.loads(await resp.read())
+
+
+def _nearby_cache_key(place_name: str, radius_km: float) -> tuple:
+    # float radius: diskcache pickles the key, so (x, 10) and (x, 10.0) would be different entries
+    return (place_name.strip().lower(), round(float(radius_km), 2))
+
+
+def _nearby_cache_get(cache_key: tuple):
+    return _nearby_cache.get(cache_key)
+
+
+def _nearby_cache_put(cache_key: tuple, results: list):
+    # only successful lookups are cached; error strings never get here
+    _nearby_cache.set(cache_key, results, expire=NEARBY_CACHE_TTL)
+
+
+def _overpass_query(points: list, radius_km: float) -> str:
+    """
+    One pass over named POIs whose key is tourism/amenity/historic,
+    around every (lat, lon) in points (a union, so several places share one request).
+    """
+    radius_m = radius_km * 1000
+    statements = "".join(
+        f'node(around:{radius_m},{lat},{lon})["name"][~"^(tourism|amenity|historic)$"~"."];'
+        for lat, lon in points
+    )
+    return f'[out:json][timeout:25];({statements});out body;'
+
+
+def _parse_overpass(data: dict, lat: float, lon: float, radius_km: float = None) -> list:
+    """
+    Nearest-first [{"name", "distance_km"}], distances from one vectorized haversine.
+    With radius_km, only elements within that distance of (lat, lon) are kept.
+    """
+    elements = data.get("elements", [])
+    if not elements:
+        return []
+
+    names = [el["tags"]["name"] for el in elements]
+    lats = np.radians(np.fromiter((el["lat"] for el in elements), dtype=np.float64, count=len(elements)))
+    lons = np.radians(np.fromiter((el["lon"] for el in elements), dtype=np.float64, count=len(elements)))
+    lat0, lon0 = np.radians(lat), np.radians(lon)
+
+    a = np.sin((lats - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2) ** 2
+    dists = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    order = np.argsort(dists, kind="stable")
+    if radius_km is not None:
+        order = order[dists[order] <= radius_km]
+    return [{"name": names[i], "distance_km": float(dists[i])} for i in order]
+
+
 def find_nearby_places(place_name: str, radius_km: float):
     """Queries Overpass API to find nearby points of interest."""
+    return _run_async(_find_nearby_places(place_name, radius_km))
+
+
+def prewarm_nearby_places(place_names: list, radius_km: float, stop_event: threading.Event = None):
+    """
+    find_nearby_places_batch for startup warming, run by only one worker per NEARBY_CACHE_TTL:
+    Cache.add is atomic across processes, so the other workers skip it.
+    If nothing got warmed (e.g. Overpass was down) or stop_event cut it short,
+    the claim is released for the next start.
+    """
+    if not _nearby_cache.add(PREWARM_FLAG_KEY, True, expire=NEARBY_CACHE_TTL):
+        return
+    try:
+        found = find_nearby_places_batch(place_names, radius_km, stop_event)
+    except BaseException:
+        _nearby_cache.delete(PREWARM_FLAG_KEY)
+        raise
+    stopped = stop_event is not None and stop_event.is_set()
+    if stopped or all(isinstance(results, str) for results in found.values()):
+        _nearby_cache.delete(PREWARM_FLAG_KEY)
+
+
+def find_nearby_places_batch(place_names: list, radius_km: float, stop_event: threading.Event = None) -> dict:
+    """
+    find_nearby_places for several places with a single Overpass request.
+    Returns {place_name: results list or error string}.
+    Setting stop_event ends the (rate-limited, ~1 s per place) geocoding early;
+    the places handled so far are returned and no Overpass request is made.
+    """
+    found = {}
+    pending = {}
+    for place_name in place_names:
+        if stop_event is not None and stop_event.is_set():
+            return found
+        coords = get_coordinates(place_name)
+        if not coords:
+            found[place_name] = f"Could not find coordinates for '{place_name}'."
+            continue
+        cached = _nearby_cache_get(_nearby_cache_key(place_name, radius_km))
+        if cached is not None:
+            found[place_name] = cached
+        else:
+            pending[place_name] = coords
+
+    if not pending:
+        return found
+
+    async def fetch(query):
+        return await _overpass_post(await _get_aio_client(), query, timeout=60)
+
+    try:
+        data = _run_async(fetch(_overpass_query(list(pending.values()), radius_km)))
+    except Exception:
+        for place_name in pending:
+            found[place_name] = "Overpass API request failed. Try again later."
+        return found
+
+    # split the union back per place: each keeps the elements within its own radius
+    for place_name, (lat, lon) in pending.items():
+        results = _parse_overpass(data, lat, lon, radius_km)
+        _nearby_cache_put(_nearby_cache_key(place_name, radius_km), results)
+        found[place_name] = results
+    return found
+
+
+async def find_nearby_places_async(place_name: str, radius_km: float):
+    """
+    Non-blocking find_nearby_places for async routes, awaitable from any event loop.
+    The lookup itself runs on the tools loop, so it shares the one aiohttp client.
+    """
+    future = asyncio.run_coroutine_threadsafe(_find_nearby_places(place_name, radius_km), _aio_loop)
+    return await asyncio.wrap_future(future)
+
+
+async def _find_nearby_places(place_name: str, radius_km: float):
+    # runs on the tools loop; geocoding (blocking, rate-limited) goes to a thread
     global last_place_coords
-    
-    coords = get_coordinates(place_name)
+
+    coords = await asyncio.to_thread(get_coordinates, place_name)
     if not coords:
         return f"Could not find coordinates for '{place_name}'."
 
     last_place_coords = coords
+
     lat, lon = coords
-    radius_m = radius_km * 1000
+    client = await _get_aio_client()
+    return await _overpass_nearby(client, lat, lon, radius_km, _nearby_cache_key(place_name, radius_km))
 
-    query = f"""
-    (
-      node(around:{radius_m},{lat},{lon})["tourism"];
-      node(around:{radius_m},{lat},{lon})["amenity"];
-      node(around:{radius_m},{lat},{lon})["historic"];
-    );
-    out body;
-    """
+
+async def _overpass_nearby(client: aiohttp.ClientSession, lat: float, lon: float, radius_km: float, cache_key: tuple):
+    """Nearby POIs around already-resolved coordinates; cache_key names the place for the disk cache."""
+    cached = _nearby_cache_get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
-        data = overpass_api.get(query)
+        data = await _overpass_post(client, _overpass_query([(lat, lon)], radius_km))
     except Exception:
         return "Overpass API request failed. Try again later."
 
-    results = []
-    for feature in data['features']:
-        name = feature['properties'].get('name')
-        if name:
-            place_lat = feature['geometry']['coordinates'][1]
-            place_lon = feature['geometry']['coordinates'][0]
-            dist = geodesic((lat, lon), (place_lat, place_lon)).km
-            results.append({"name": name, "distance_km": dist})
-
-    results = sorted(results, key=lambda x: x["distance_km"])
+    results = _parse_overpass(data, lat, lon)
+    _nearby_cache_put(cache_key, results)
     return results
 
 # =======================================
@@ -94,6 +370,98 @@ def generate_route_prompt(city: str, best_places: list) -> str:
     )
     return prompt
 
+# ======================================
+# Helper: Route optimisation
+# ======================================
+def _distance_matrix(points: list) -> np.ndarray:
+    """Pairwise haversine distances (km) between (lat, lon) points, in one vectorized pass."""
+    pts = np.radians(np.asarray(points, dtype=np.float64))
+    lats, lons = pts[:, 0], pts[:, 1]
+    dlat = lats[:, None] - lats[None, :]
+    dlon = lons[:, None] - lons[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lats[:, None]) * np.cos(lats[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _held_karp(D: np.ndarray) -> list:
+    """
+    Exact shortest open path starting at index 0 and visiting every other index once.
+    dp[mask, i] = cheapest way to visit the places in mask, ending at place i;
+    each mask is extended to every unvisited place j in one vectorized step.
+    """
+    n = len(D) - 1
+    full = 1 << n
+    bits = 1 << np.arange(n)
+    dist = D[1:, 1:]
+
+    dp = np.full((full, n), np.inf)
+    parent = np.full((full, n), -1, dtype=np.int8)
+    dp[bits, np.arange(n)] = D[0, 1:]
+
+    for mask in range(1, full - 1):
+        # cand[i, j] = reach i having visited mask, then go to j (inf if i not in mask)
+        cand = dp[mask][:, None] + dist
+        best_i = np.argmin(cand, axis=0)
+        free = np.nonzero((mask & bits) == 0)[0]
+        # (mask | j, j) is only ever reached from mask, so plain assignment is enough
+        nxt = mask | bits[free]
+        dp[nxt, free] = cand[best_i[free], free]
+        parent[nxt, free] = best_i[free]
+
+    # walk parent pointers back from the cheapest end point
+    mask = full - 1
+    last = int(np.argmin(dp[mask]))
+    order = []
+    while last != -1:
+        order.append(last + 1)
+        last, mask = int(parent[mask, last]), mask ^ (1 << last)
+    return order[::-1]
+
+
+def _nearest_neighbor(D: np.ndarray) -> list:
+    """Greedy open path from index 0: always move to the closest unvisited point."""
+    order = [0]
+    remaining = list(range(1, len(D)))
+    while remaining:
+        order.append(remaining.pop(int(np.argmin(D[order[-1], remaining]))))
+    return order[1:]
+
+
+def _branch_and_bound(D: np.ndarray, max_nodes: int = BRANCH_AND_BOUND_MAX_NODES) -> list:
+    """
+    Depth-first search over open paths from index 0, seeded with the nearest-neighbour path.
+    A branch is dropped as soon as its length reaches the best complete path so far;
+    children are tried nearest first so good paths (and tight bounds) turn up early.
+    Exact if it finishes within max_nodes expansions, otherwise the best path found.
+    """
+    dist = D.tolist()
+    best_order = _nearest_neighbor(D)
+    best = sum(dist[a][b] for a, b in zip([0] + best_order, best_order))
+    path = []
+    expanded = 0
+
+    def visit(prev, remaining, length):
+        nonlocal best, best_order, expanded
+        if not remaining:
+            if length < best:
+                best, best_order = length, path.copy()
+            return
+        expanded += 1
+        if expanded > max_nodes:
+            return
+        row = dist[prev]
+        for child in sorted(remaining, key=row.__getitem__):
+            step = length + row[child]
+            if step >= best:
+                break  # children are sorted, so every later one is longer too
+            path.append(child)
+            visit(child, remaining - {child}, step)
+            path.pop()
+
+    visit(0, frozenset(range(1, len(D))), 0.0)
+    return best_order
+
+
 # ======================================
 # Helper: Plan trip Wikivoyage
 # ======================================
@@ -104,33 +472,31 @@ def get_travel_insights(city: str) -> str:
     Includes: Best areas, safety, culture, transport tips.
     """
     try:
-        params = {
-            "action": "query",
-            "prop": "extracts",
-            "format": "json",
-            "titles": city,
-            "origin": "*",
-            "formatversion": 2,
-            "explaintext": 1
-        }
-        r = requests.get("https://en.wikivoyage.org/w/api.php", params=params).json()
-        text = r.get("query", {}).get("pages", [{}])[0].get("extract", "")
+        params = {**WIKIVOYAGE_PARAMS, "titles": city}
+        r = _json(SESSION.get(WIKIVOYAGE_URL, params=params, timeout=HTTP_TIMEOUT))
+        try:
+            text = r["query"]["pages"][0]["extract"]
+        except (KeyError, IndexError):
+            text = ""
 
         if not text:
             return f"No travel guide found for {city}."
 
-        wanted = ["Understand", "Get in", "Get around", "Stay safe", "Eat", "Drink"]
-        output = []
-
-        for section in wanted:
-            if section.lower() in text.lower():
-                part = text.split(section,1)[-1]
-                cleaned = part.split("\n\n",1)[-1].strip()
-                output.append(f"### {section}\n{cleaned[:600].strip()}")
+        # one scan over the top-level "== Heading ==" lines; a section runs to the next one
+        headings = list(WIKIVOYAGE_HEADING_RE.finditer(text))
+        sections = {}
+        for i, m in enumerate(headings):
+            title = m.group(1)
+            if title in WIKIVOYAGE_SECTIONS and title not in sections:
+                end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+                sections[title] = text[m.end():end].strip()
 
+        output = [f"### {section}\n{sections[section][:600].strip()}" for section in WIKIVOYAGE_SECTIONS if section in sections]
         return "\n\n".join(output) or text[:1200]
 
-    except:
+    except (requests.RequestException, ValueError) as e:
+        # the session has already retried transient failures by the time we get here
+        logger.warning("Wikivoyage lookup failed for %r: %s", city, e)
         return f"Failed to fetch travel guide for {city}."
 
 
@@ -141,8 +507,11 @@ def get_place_pros_cons(city: str) -> str:
     - Wikivoyage travel insights
     (No hallucinated data; only summarize what is available.)
     """
-    description = get_place_description.invoke({"place_name": city})
-    insights = get_travel_insights(city)
+    # the two sources are independent → fetch them concurrently
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        description_future = ex.submit(get_place_description.invoke, {"place_name": city})
+        insights_future = ex.submit(get_travel_insights, city)
+        description, insights = description_future.result(), insights_future.result()
 
     prompt = f"""
     You are a travel researcher.
@@ -168,50 +537,48 @@ def get_place_pros_cons(city: str) -> str:
     return response.content
 
 
-def get_real_places(city: str, limit: int = 10) -> list:
+async def _get_json(client: aiohttp.ClientSession, url: str):
+    timeout = aiohttp.ClientTimeout(sock_connect=HTTP_TIMEOUT[0], sock_read=HTTP_TIMEOUT[1])
+    async with client.get(url, timeout=timeout) as resp:
+        resp.raise_for_status()
+        return orjson.loads(await resp.read())
+
+
+async def _real_places(lat: float, lon: float, limit: int = 10):
     """
-    Get real popular places with categories & popularity score
-    from OpenTripMap (not hallucinated).
+    Real popular places with categories & popularity score
+    from OpenTripMap (not hallucinated), around already-resolved coordinates.
     """
     try:
-        # Step 1: Get coordinates of city
-        coord_url = f"https://geocode.maps.co/search?q={city}"
-        geo = requests.get(coord_url).json()
-        if not geo:
-            return f"Could not find '{city}'."
-
-        lat = geo[0]["lat"]
-        lon = geo[0]["lon"]
-
-        # Step 2: Fetch places nearby
-        places_url = (
-            f"https://api.opentripmap.com/0.1/en/places/radius?"
-            f"radius=5000&lon={lon}&lat={lat}&limit={limit}&apikey={OPENTRIPMAP_API_KEY}"
-        )
-        data = requests.get(places_url).json()
-
-        results = []
-        for p in data.get("features", []):
-            xid = p["properties"].get("xid")
-            name = p["properties"].get("name")
-            if not xid or not name:
-                continue
-
-            # Step 3: Get place details
-            detail = requests.get(
-                f"https://api.opentripmap.com/0.1/en/places/xid/{xid}?apikey={OPENTRIPMAP_API_KEY}"
-            ).json()
+        # format=json already carries kinds/rate per place
+        url = OPENTRIPMAP_RADIUS_URL.format(lon=lon, lat=lat, limit=limit, apikey=OPENTRIPMAP_API_KEY)
+        data = await _get_json(await _get_aio_client(), url)
+        if not isinstance(data, list):
+            # error payloads come back as an object, e.g. {"error": "..."}
+            return f"Error fetching real places: {data}"
+
+        results = [
+            {
+                "name": p["name"],
+                "category": p.get("kinds", "Unknown"),
+                "popularity": p.get("rate", "Unknown")
+            }
+            for p in data
+            if isinstance(p, dict) and p.get("name")
+        ]
+    except Exception as e:
+        return f"Error fetching real places: {str(e)}"
 
-            results.append({
-                "name": name,
-                "category": detail.get("kinds", "Unknown"),
-                "popularity": detail.get("rate", "Unknown")
-            })
+    return results or "No real places found."
 
-        return results or "No real places found."
 
-    except Exception as e:
-        return f"Error fetching real places: {str(e)}"
+async def _trip_places(city: str, lat: float, lon: float):
+    """Overpass nearby places and OpenTripMap places for one city, fetched side by side."""
+    client = await _get_aio_client()
+    return await asyncio.gather(
+        _overpass_nearby(client, lat, lon, 10, _nearby_cache_key(city, 10)),
+        _real_places(lat, lon, limit=10),
+    )
 
 # ======================================
 # Tool 1: Find Nearby Places
@@ -235,16 +602,33 @@ def find_nearby_tool(place_name: str, radius_km: float) -> str:
 # ======================================
 # Tool 2: Get Place Description
 # ======================================
+@lru_cache(maxsize=512)
+def _wiki_summary(place_name: str) -> str:
+    # one REST call returns the already plain-text lead extract;
+    # transient failures raise (and so aren't memoized), get_place_description reports them
+    resp = SESSION.get(WIKI_SUMMARY_URL + quote(place_name.replace(" ", "_"), safe=""), timeout=HTTP_TIMEOUT)
+    # 404 = no such page, 400 = not a valid title; either way there's nothing to describe
+    if 400 <= resp.status_code < 500 and resp.status_code != 429:
+        return f"No Wikipedia page found for '{place_name}'."
+    resp.raise_for_status()
+
+    data = _json(resp)
+    if data.get("type") == "disambiguation":
+        return f"Multiple matches found for '{place_name}'. Try a more specific name."
+
+    # keep it short: first 3 sentences
+    sentences = re.split(r"(?<=[.!?])\s+", data.get("extract", "").strip())
+    return f"About {place_name}:\n{' '.join(sentences[:3])}"
+
+
 @tool("get_place_description")
 def get_place_description(place_name: str) -> str:
     """Fetch a short Wikipedia description for a given place."""
     try:
-        summary = wikipedia.summary(place_name, sentences=3)
-        return f"About {place_name}:\n{summary}"
-    except wikipedia.exceptions.DisambiguationError as e:
-        return f"Multiple matches found for '{place_name}': {', '.join(e.options[:5])}"
-    except wikipedia.exceptions.PageError:
-        return f"No Wikipedia page found for '{place_name}'."
+        return _wiki_summary(place_name)
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Wikipedia lookup failed for %r: %s", place_name, e)
+        return f"Description unavailable for '{place_name}' right now."
 
 
 # ======================================
@@ -266,80 +650,63 @@ def get_distance_tool(place1: str, place2: str) -> str:
 # Tool 4: Gets the weather forcast of the place 
 # ======================================
 @tool("get_weather")
-def get_weather_tool(city: str, start_date: str = None, end_date: str = None) -> str:
+def get_weather_tool(city: str, start_date: str = None, end_date: str = None) -> dict:
     """
     Fetches weather data for a city.
-    - If both start_date and end_date are given → returns a forecast for that range.
-    - If only one date is given → returns weather for that day.
+    - If both start_date and end_date are given → returns a daily forecast for that range.
+    - If only one date is given → returns the forecast for that day.
     - If no date is given → returns current weather.
+    Result: {"location": city, "forecast": [...]} or {"location": city, "current": {...}},
+    or {"error": "..."} on failure.
     """
     try:
         coords = get_coordinates(city)
         if not coords:
-            return f"Could not find coordinates for '{city}'."
+            return {"error": f"Could not find coordinates for '{city}'."}
         lat, lon = coords
 
-        # ---------- RANGE FORECAST ----------
-        if start_date and end_date:
-            url = (
-                f"https://api.open-meteo.com/v1/forecast?"
-                f"latitude={lat}&longitude={lon}"
-                f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode"
-                f"&timezone=auto&start_date={start_date}&end_date={end_date}"
-            )
-            r = requests.get(url, timeout=15).json()
-            daily = r.get("daily", {})
-
-            if not daily:
-                return f"No forecast available for {city} between {start_date} and {end_date}."
-
-            lines = [f"Weather Forecast for {city} ({start_date} → {end_date}):"]
-            for i, date in enumerate(daily.get("time", [])):
-                max_t = daily.get("temperature_2m_max", ["-"])[i]
-                min_t = daily.get("temperature_2m_min", ["-"])[i]
-                prec = daily.get("precipitation_sum", ["-"])[i]
-                code = daily.get("weathercode", ["-"])[i]
-                lines.append(f"{date}: Max {max_t}°C / Min {min_t}°C / Rain {prec}mm / Code {code}")
-            return "\n".join(lines)
-
-        # ---------- SINGLE DAY FORECAST ----------
-        elif start_date:
-            url = (
-                f"https://api.open-meteo.com/v1/forecast?"
-                f"latitude={lat}&longitude={lon}"
-                f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode"
-                f"&timezone=auto&start_date={start_date}&end_date={start_date}"
-            )
-            r = requests.get(url, timeout=15).json()
-            daily = r.get("daily", {})
-            if not daily:
-                return f"No forecast available for {city} on {start_date}."
-            return (
-                f"Weather Forecast for {city} on {start_date}:\n"
-                f"- Max Temp: {daily.get('temperature_2m_max', ['-'])[0]}°C\n"
-                f"- Min Temp: {daily.get('temperature_2m_min', ['-'])[0]}°C\n"
-                f"- Rainfall: {daily.get('precipitation_sum', ['-'])[0]} mm\n"
-                f"- Code: {daily.get('weathercode', ['-'])[0]}"
-            )
+        # ---------- DAILY FORECAST (range or single day) ----------
+        if start_date:
+            end_date = end_date or start_date
+            url = OPEN_METEO_DAILY_URL.format(lat=lat, lon=lon, start_date=start_date, end_date=end_date)
+            r = _json(SESSION.get(url, timeout=(HTTP_TIMEOUT[0], 15)))
+
+            # pull each column out once and walk them together
+            try:
+                daily = r["daily"]
+                times = daily["time"]
+                maxs = daily["temperature_2m_max"]
+                mins = daily["temperature_2m_min"]
+                precs = daily["precipitation_sum"]
+                codes = daily["weathercode"]
+            except KeyError:
+                return {"error": f"No forecast available for {city} between {start_date} and {end_date}."}
+
+            forecast = [
+                {"date": d, "max_temp": hi, "min_temp": lo, "rain_mm": rain, "weather_code": code}
+                for d, hi, lo, rain, code in zip(times, maxs, mins, precs, codes)
+            ]
+            return {"location": city, "forecast": forecast}
 
         # ---------- CURRENT WEATHER ----------
         else:
-            url = (
-                f"https://api.open-meteo.com/v1/forecast?"
-                f"latitude={lat}&longitude={lon}"
-                f"&current_weather=true&timezone=auto"
-            )
-            r = requests.get(url, timeout=10).json()
-            current = r.get("current_weather", {})
-            return (
-                f"Current Weather in {city}:\n"
-                f"- Temperature: {current.get('temperature', '-') }°C\n"
-                f"- Wind Speed: {current.get('windspeed', '-') } km/h\n"
-                f"- Weather Code: {current.get('weathercode', '-')}"
-            )
+            url = OPEN_METEO_CURRENT_URL.format(lat=lat, lon=lon)
+            r = _json(SESSION.get(url, timeout=HTTP_TIMEOUT))
+            try:
+                current = r["current_weather"]
+                return {
+                    "location": city,
+                    "current": {
+                        "temperature": current["temperature"],
+                        "windspeed": current["windspeed"],
+                        "weather_code": current["weathercode"],
+                    }
+                }
+            except KeyError:
+                return {"error": f"No current weather available for {city}."}
 
     except Exception as e:
-        return f"Weather data unavailable: {str(e)}"
+        return {"error": f"Weather data unavailable: {str(e)}"}
 
 
 # ======================================
@@ -352,20 +719,21 @@ def get_best_route_tool(city: str, places: list) -> dict:
     Returns both readable text and coordinates for map visualization.
     """
     try:
-        city_location = geolocator.geocode(city)
-        if not city_location:
-            return {"error": f"Couldn't find location for '{city}'."}
+        # Geocode city + places in one concurrent phase; cache hits return at once
+        # and real Nominatim calls are still spaced out by the shared RateLimiter
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            city_coords, *place_coords = ex.map(get_coordinates, [city] + list(places))
 
-        city_coords = (city_location.latitude, city_location.longitude)
+        if not city_coords:
+            return {"error": f"Couldn't find location for '{city}'."}
 
-        # Get coordinates for each place
+        # Keep the places that resolved
         valid_places = []
-        for place in places:
-            location = geolocator.geocode(place)
+        for place, location in zip(places, place_coords):
             if location:
                 valid_places.append({
                     "name": place,
-                    "coords": (location.latitude, location.longitude)
+                    "coords": location
                 })
             else:
                 print(f"Warning: '{place}' not found, skipping...")
@@ -373,34 +741,29 @@ def get_best_route_tool(city: str, places: list) -> dict:
         if not valid_places:
             return {"error": "No valid places found. Please check your place names."}
 
-        # Compute all possible routes
-        routes = []
-        for perm in itertools.permutations(valid_places):
-            total_distance = 0
-            prev = city_coords
-            for p in perm:
-                total_distance += geodesic(prev, p["coords"]).km
-                prev = p["coords"]
-            routes.append((total_distance, [p["name"] for p in perm]))
-
-        # Find shortest route
-        best = min(routes, key=lambda x: x[0])
-        best_places = best[1]
-        total_distance = best[0]
-
-        # Collect coordinates for plotting (city + route)
-        coords = [city_coords]
-        for p in valid_places:
-            if p["name"] in best_places:
-                coords.append(p["coords"])
+        # Distance matrix over city (index 0) + places, then pick the visiting order
+        points = [city_coords] + [p["coords"] for p in valid_places]
+        D = _distance_matrix(points)
+        if len(valid_places) <= HELD_KARP_MAX_PLACES:
+            order = _held_karp(D)
+        else:
+            order = _branch_and_bound(D)
+
+        # haversine is enough to rank routes; report the chosen one with geodesic accuracy
+        total_distance = sum(geodesic(points[a], points[b]).km for a, b in zip([0] + order, order))
+        best_places = [valid_places[i - 1]["name"] for i in order]
+
+        # Collect coordinates for plotting (city + route, in visiting order)
+        coords = [(city_coords, city)] + [(points[i], valid_places[i - 1]["name"]) for i in order]
 
         # Prepare output
         route_str = " → ".join([city] + best_places)
         text = f"Best route: {route_str} (Total distance: {total_distance:.2f} km)"
-        coord_list = [{"lat": c[0], "lon": c[1]} for c in coords]
+        coord_list = [{"lat": c[0], "lon": c[1], "name": name} for c, name in coords]
 
         return {
             "route_info": text,
+            "best_places": best_places,
             "coordinates": coord_list
         }
 
@@ -408,33 +771,64 @@ def get_best_route_tool(city: str, places: list) -> dict:
         return {"error": f"Error generating route: {str(e)}"}
     
 
+def plan_and_describe_route(city: str, places: list) -> dict:
+    """
+    Computes the best route and describes it with a single direct LLM call.
+    Returns the get_best_route_tool output plus a "description" key.
+    """
+    result = get_best_route_tool.invoke({"city": city, "places": places})
+    if "error" in result:
+        return result
+
+    prompt = generate_route_prompt(city, result["best_places"])
+    try:
+        result["description"] = llm.invoke(prompt).content if prompt else ""
+    except Exception as e:
+        # the route itself is already computed; don't lose it over the description
+        logger.warning("Route description failed for %r: %s", city, e)
+        result["description"] = f"⚠️ Error while describing the route: {str(e)}"
+    return result
+
+
 # ======================================
 # Tool 6: Plan Trip Itinerary 
 # ======================================
-@tool("plan_trip")
-def plan_trip_tool(city: str, days: int, interests: str, budget: str, mode: str) -> str:
-    """Generate a structured multi-day itinerary using nearby places & user preferences,
-    including pros/cons info, estimated time to visit each attraction, and best season to visit."""
+def _plan_trip_prompt(city: str, days: int, interests: str, budget: str, mode: str) -> str:
+    """Gathers the places and pros/cons for city and builds the itinerary prompt."""
+    # Step 2 (pros/cons) doesn't need coordinates → start it right away
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        pros_cons_future = ex.submit(get_place_pros_cons, city)
+
+        # Steps 1 + 1b: geocode once, then query Overpass and OpenTripMap concurrently
+        coords = get_coordinates(city)
+        if coords:
+            nearby, real_places = _run_async(_trip_places(city, *coords))
+        else:
+            nearby, real_places = [], []
 
     # Step 1: Get nearby places (Overpass)
-    nearby = find_nearby_places(city, 10)
     if isinstance(nearby, str) or not nearby:
         nearby_names = []
     else:
         nearby_names = [p['name'] for p in nearby[:10]]
 
     # Step 1b: Get popular real places (OpenTripMap)
-    real_places = get_real_places(city, limit=10)
     if isinstance(real_places, str):
         real_names = []
     else:
         real_names = [p['name'] for p in real_places]
 
-    # Combine all place names (deduplicate)
-    all_places = list(dict.fromkeys(nearby_names + real_names))[:15]
+    # Combine all place names (deduplicate, max 15); OpenTripMap first, it has the richer metadata
+    seen = {}
+    for name in itertools.chain(real_names, nearby_names):
+        if name not in seen:
+            seen[name] = None
+            if len(seen) == 15:
+                break
+    all_places = list(seen)
 
     # Step 2: Gather pros/cons info for the main city
-    city_pros_cons = get_place_pros_cons(city)
+    city_pros_cons = pros_cons_future.result()
 
     # Step 3: Prepare LLM prompt including pros/cons info, best visiting season, and weather
     prompt = f"""
@@ -461,6 +855,19 @@ def plan_trip_tool(city: str, days: int, interests: str, budget: str, mode: str)
     - Include estimated visit time per attraction
     - Include travel time between attractions
     """
+    return prompt
 
-    response = llm.invoke(prompt)
-    return response.content
\ No newline at end of file
+
+def plan_trip_stream(city: str, days: int, interests: str, budget: str, mode: str):
+    """Yields the itinerary text piece by piece as Gemini generates it."""
+    prompt = _plan_trip_prompt(city, days, interests, budget, mode)
+    for chunk in llm.stream(prompt):
+        if isinstance(chunk.content, str):
+            yield chunk.content
+
+
+@tool("plan_trip")
+def plan_trip_tool(city: str, days: int, interests: str, budget: str, mode: str) -> str:
+    """Generate a structured multi-day itinerary using nearby places & user preferences,
+    including pros/cons info, estimated time to visit each attraction, and best season to visit."""
+    return "".join(plan_trip_stream(city, days, interests, budget, mode))
\ No newline at end of file